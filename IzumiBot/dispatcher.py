@@ -0,0 +1,195 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+from nonebot.adapters.cqhttp import Bot as CQHTTPBot
+from nonebot.adapters.cqhttp import Message
+from nonebot.exception import NetworkError
+
+T_Target = Tuple[str, int]
+T_APICall = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+SEND_APIS = {"send_msg", "send_group_msg", "send_private_msg"}
+
+
+@dataclass
+class PendingSend:
+    api: str
+    data: Dict[str, Any]
+    future: "asyncio.Future[Any]"
+    enqueued: float = field(default_factory=perf_counter)
+
+
+class Dispatcher:
+    def __init__(
+        self,
+        call: T_APICall,
+        interval: float = 0.5,
+        global_interval: float = 0.2,
+        concurrency: int = 4,
+        retries: int = 3,
+        merge_length: int = 100,
+    ):
+        self.call = call
+        self.interval = interval
+        self.global_interval = global_interval
+        self.retries = retries
+        self.merge_length = merge_length
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+        self.queues: Dict[T_Target, Deque[PendingSend]] = {}
+        self.workers: Dict[T_Target, "asyncio.Task[None]"] = {}
+        self.last_sent: Dict[T_Target, float] = {}
+        self.next_send: float = 0
+        self.latencies: Deque[float] = deque(maxlen=1000)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(map(len, self.queues.values()))
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            return latencies[int(len(latencies) * p)] if latencies else 0
+
+        return {
+            "queue_depth": self.queue_depth,
+            "targets": len(self.workers),
+            "latency_p50": percentile(0.5),
+            "latency_p99": percentile(0.99),
+        }
+
+    async def send(self, api: str, data: Dict[str, Any]) -> Any:
+        target = self.target(api, data)
+        future = asyncio.get_running_loop().create_future()
+        self.queues.setdefault(target, deque()).append(PendingSend(api, data, future))
+        if target not in self.workers:
+            self.workers[target] = asyncio.create_task(self._worker(target))
+        return await future
+
+    async def request(self, api: str, data: Dict[str, Any]) -> Any:
+        # a timed out send may still have been delivered, retrying it could
+        # post the message twice, so only the other APIs are retried
+        retries = 0 if api in SEND_APIS else self.retries
+        for attempt in range(retries + 1):
+            try:
+                async with self.semaphore:
+                    return await self.call(api, data)
+            except NetworkError:
+                if attempt >= retries:
+                    raise
+            logger.warning(f"Calling API {api!r} failed, retry #{attempt + 1}")
+            await asyncio.sleep(2**attempt)
+
+    @staticmethod
+    def target(api: str, data: Dict[str, Any]) -> T_Target:
+        if api == "send_group_msg":
+            message_type = "group"
+        elif api == "send_private_msg":
+            message_type = "private"
+        else:
+            message_type = data.get("message_type") or (
+                "group" if data.get("group_id") else "private"
+            )
+        return message_type, int(
+            data["group_id" if message_type == "group" else "user_id"]
+        )
+
+    def mergeable(self, data: Dict[str, Any], other: Dict[str, Any]) -> bool:
+        message, other_message = data["message"], other["message"]
+        if not (isinstance(message, Message) and isinstance(other_message, Message)):
+            return False
+        if {**data, "message": None} != {**other, "message": None}:
+            return False
+        if not all(segment.is_text() for segment in [*message, *other_message]):
+            return False
+        return len(str(message)) + len(str(other_message)) <= self.merge_length
+
+    async def _worker(self, target: T_Target):
+        queue = self.queues[target]
+        batch: List[PendingSend] = []
+        try:
+            while queue:
+                batch: List[PendingSend] = [queue.popleft()]
+                data = batch[0].data
+                while queue and self.mergeable(data, queue[0].data):
+                    pending = queue.popleft()
+                    message = data["message"] + "\n" + pending.data["message"]
+                    data = {**data, "message": message}
+                    batch.append(pending)
+
+                delay = self.last_sent.get(target, 0) + self.interval - perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # the account is rate limited as a whole too, reserve the next
+                # free slot before waiting so that workers never share one
+                slot = max(perf_counter(), self.next_send)
+                self.next_send = slot + self.global_interval
+                delay = slot - perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                try:
+                    result = await self.request(batch[0].api, data)
+                except Exception as e:
+                    for pending in batch:
+                        if not pending.future.done():
+                            pending.future.set_exception(e)
+                else:
+                    for pending in batch:
+                        if not pending.future.done():
+                            pending.future.set_result(result)
+                finally:
+                    self.last_sent[target] = perf_counter()
+
+                for pending in batch:
+                    self.latencies.append(self.last_sent[target] - pending.enqueued)
+                logger.debug(
+                    f"Sent {len(batch)} message(s) to {target}, "
+                    f"{len(queue)} still queued, "
+                    f"latency {(self.last_sent[target] - batch[0].enqueued) * 1000:.2f}ms"
+                )
+        except BaseException as e:
+            # e.g. cancelled on shutdown, never leave the handlers waiting
+            for pending in [*batch, *queue]:
+                if pending.future.done():
+                    continue
+                elif isinstance(e, Exception):
+                    pending.future.set_exception(e)
+                else:
+                    pending.future.cancel()
+            queue.clear()
+            raise
+        finally:
+            del self.workers[target]
+            del self.queues[target]
+            now = perf_counter()
+            for idle_target, sent in [*self.last_sent.items()]:
+                if idle_target not in self.workers and now - sent >= self.interval:
+                    del self.last_sent[idle_target]
+
+
+class QueuedBot(CQHTTPBot):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dispatcher = Dispatcher(
+            lambda api, data: super(QueuedBot, self).call_api(api, **data),
+            interval=self._config_value("send_interval", 0.5),
+            global_interval=self._config_value("send_global_interval", 0.2),
+            concurrency=self._config_value("send_concurrency", 4),
+            retries=self._config_value("send_retries", 3),
+            merge_length=self._config_value("send_merge_length", 100),
+        )
+
+    def _config_value(self, name: str, default: Any) -> Any:
+        value: Optional[Any] = getattr(self.config, name)
+        return default if value is None else value
+
+    async def call_api(self, api: str, **data) -> Any:
+        if api in SEND_APIS:
+            return await self.dispatcher.send(api, data)
+        return await self.dispatcher.request(api, data)
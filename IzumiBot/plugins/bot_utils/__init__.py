@@ -5,3 +5,4 @@ from .converter import (
     strip_nonempty_stripped_lines,
 )
 from .extractors import extract_image, extract_numbers, extract_text
+from .lazy import LazyModule
@@ -0,0 +1,33 @@
+from importlib import import_module
+from time import perf_counter
+from types import ModuleType
+from typing import Any, Optional
+
+from IzumiBot.profiler import profiler
+from nonebot import get_driver
+
+
+class LazyModule:
+    def __init__(self, name: str, package: Optional[str] = None):
+        self.name = name
+        self.package = package
+        self._module: Optional[ModuleType] = None
+        if get_driver().config.lazy_load is False:
+            # counted in the plugin's import time by the profiler instead
+            self._module = import_module(self.name, self.package)
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            start = perf_counter()
+            self._module = import_module(self.name, self.package)
+            # plugins live under nonebot's internal namespace, keep their short name
+            plugin_name = (self.package or self.name).rsplit(".", 1)[-1]
+            profiler.record_init(plugin_name, perf_counter() - start)
+        return self._module
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.load(), name)
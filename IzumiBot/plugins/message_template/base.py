@@ -1,12 +1,24 @@
-from typing import List, Optional, Type
+from typing import Any, Collection, Dict, List, Optional, Set, Tuple, Type
 
 from . import syntax
-from .exceptions import TemplateError, TemplateSyntaxError
+from .exceptions import TemplateContextError, TemplateError, TemplateSyntaxError
+from .schema import ITEM, T_Path, build_include, check_path
+from .utils import Evaluation
+
+T_Scope = Tuple[str, Optional[T_Path]]
 
 
 class Compiler(object):
-    def __init__(self, template_string: str):
+    def __init__(
+        self,
+        template_string: str,
+        filters: Optional[Collection[str]] = None,
+        default_filter: Optional[str] = None,
+    ):
         self.template_string = template_string
+        self.filters = filters
+        self.default_filter = default_filter
+        self.context_paths: Set[T_Path] = set()
 
     @property
     def fragments(self):
@@ -34,8 +46,63 @@ class Compiler(object):
             if new_node.creates_scope:
                 scope_stack.append(new_node)
                 new_node.enter_scope()
+        self.analyze(root, [])
         return root
 
+    def analyze(self, node: syntax.Node, scopes: List[T_Scope]):
+        if isinstance(node, syntax.Each):
+            return self.analyze_each(node, scopes)
+
+        for name in node.references():
+            self.add_path(name, scopes)
+        if isinstance(node, syntax.Variable):
+            self.check_filter(node)
+        for child in node.children:
+            self.analyze(child, scopes)
+
+    def analyze_each(self, node: syntax.Each, scopes: List[T_Scope]):
+        it_path = (
+            self.resolve_path(node.it.result, scopes)
+            if node.it.type is Evaluation.ResultType.NAME
+            else None
+        )
+        if node.max is not None and node.max.type is Evaluation.ResultType.NAME:
+            self.add_path(node.max.result, scopes)
+
+        item_path = None if it_path is None else (*it_path, ITEM)
+        for child in node.children:
+            self.analyze(child, [*scopes, (node.item_name, item_path)])
+        if item_path is not None and not any(
+            path[: len(item_path)] == item_path for path in self.context_paths
+        ):
+            # items are never read, but still needed to iterate
+            self.context_paths.add(item_path)
+
+    def add_path(self, name: str, scopes: List[T_Scope]):
+        path = self.resolve_path(name, scopes)
+        if path is not None:
+            self.context_paths.add(path)
+
+    def check_filter(self, node: syntax.Variable):
+        filter = node.filter if node.filter is not None else self.default_filter
+        if self.filters is None or filter is None:
+            return
+        if filter not in self.filters:
+            raise TemplateError(f"filter {filter} does not exist in context.")
+
+    def resolve_path(self, name: str, scopes: List[T_Scope]) -> Optional[T_Path]:
+        if name.startswith(".."):
+            if not scopes:
+                raise TemplateContextError(name)
+            scopes, name = scopes[:-1], name[2:]
+        root, *tokens = name.split(".")
+        if not scopes:
+            return (root, *tokens)
+        item_name, item_path = scopes[-1]
+        if root != item_name:
+            raise TemplateContextError(name)
+        return None if item_path is None else (*item_path, *tokens)
+
     def create_node(
         self,
         fragment: syntax.Fragment,
@@ -67,14 +134,30 @@ class Template(object):
         contents: str,
         filters: Optional[List[syntax.T_Filter]] = None,
         default_filter: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None,
     ):
         self.contents = contents
-        self.root = Compiler(contents).compile()
         self.configs: syntax.RootContext = {
             "_filters": {filter.__name__: filter for filter in (filters or [])},
             "_default_filter": default_filter,
         }
+        compiler = Compiler(contents, self.configs["_filters"], default_filter)
+        self.root = compiler.compile()
+        self.context_paths = compiler.context_paths
+        self.context_names = {name for name, *_ in self.context_paths}
+        if context is not None:
+            self.check_context(context)
+
+    def check_context(self, context: Dict[str, Any]):
+        for name, *path in self.context_paths:
+            if name not in context:
+                raise TemplateContextError(name)
+            check_path(name, tuple(path), context[name])
+
+    def include(self, name: str) -> Optional[Dict[Any, Any]]:
+        paths = [tuple(path) for root, *path in self.context_paths if root == name]
+        return None if () in paths else build_include(paths)
 
     def render(self, **kwargs):
-        context: syntax.RootContext = {**kwargs, **self.configs}  # type:ignore
+        context: syntax.RootContext = {**kwargs, **self.configs}  # type: ignore
         return self.root.render(context)
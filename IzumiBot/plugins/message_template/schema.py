@@ -0,0 +1,73 @@
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterable, Tuple, Union, get_args, get_origin
+
+from pydantic import BaseModel, Extra
+
+from .exceptions import TemplateContextError
+
+T_Path = Tuple[str, ...]
+
+ITEM = "*"
+
+SCALAR_TYPES = (str, bytes, int, float, bool)
+
+
+def check_path(name: str, path: T_Path, annotation: Any):
+    for index, token in enumerate(path):
+        annotation = _unwrap_optional(annotation)
+        origin = get_origin(annotation) or annotation
+        args = get_args(annotation)
+
+        if annotation is Any or not isinstance(origin, type):
+            return
+        elif issubclass(origin, Mapping):
+            key_type, value_type = args if args else (Any, Any)
+            annotation = key_type if token == ITEM else value_type
+        elif token == ITEM or token.isdigit():
+            if not issubclass(origin, Sequence):
+                raise TemplateContextError(".".join((name, *path[: index + 1])))
+            annotation = str if issubclass(origin, str) else args[0] if args else Any
+        elif issubclass(origin, Sequence) and not issubclass(origin, SCALAR_TYPES):
+            # sequence items are only reachable by position
+            raise TemplateContextError(".".join((name, *path[: index + 1])))
+        elif issubclass(origin, BaseModel):
+            field = origin.__fields__.get(token)
+            if field is not None:
+                annotation = field.outer_type_
+            elif origin.__config__.extra is Extra.allow:
+                return
+            else:
+                raise TemplateContextError(".".join((name, *path[: index + 1])))
+        elif origin in SCALAR_TYPES and not hasattr(origin, token):
+            raise TemplateContextError(".".join((name, *path[: index + 1])))
+        else:
+            return
+
+
+def build_include(paths: Iterable[T_Path]) -> Dict[Union[str, int], Any]:
+    include: Dict[Union[str, int], Any] = {}
+    for path in sorted(paths, key=len):
+        cursor = include
+        for index, token in enumerate(path):
+            key: Union[str, int]
+            if token == ITEM:
+                key = "__all__"
+            elif token.isdigit():
+                key = int(token)
+            else:
+                key = token
+            if cursor.get(key) is ...:
+                # a shorter path already includes the whole value
+                break
+            elif index == len(path) - 1:
+                cursor[key] = ...
+            else:
+                cursor = cursor.setdefault(key, {})
+    return include
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return args[0] if len(args) == 1 else Any
+    return annotation
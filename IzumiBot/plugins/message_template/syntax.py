@@ -5,7 +5,7 @@ from enum import IntEnum, auto
 from typing import Any, Callable, Dict, List, Optional, TypedDict
 
 from .exceptions import TemplateError, TemplateSyntaxError
-from .utils import Evaluation, resolve
+from .utils import Evaluation, names, resolve
 
 T_Filter = Callable[[Any], str]
 
@@ -94,6 +94,9 @@ class Node(metaclass=ABCMeta):
     def process_fragment(self, fragment: Fragment):
         ...
 
+    def references(self) -> List[str]:
+        return []
+
     def enter_scope(self):
         ...
 
@@ -133,19 +136,26 @@ class Root(Node):
 
 class Variable(Node):
     def process_fragment(self, fragment: Fragment):
-        self.name = fragment.clean
+        self.filter: Optional[str]
+        if "|" in fragment.clean:
+            name, filter = fragment.clean.split("|", 1)
+            self.name, self.filter = name.strip(), filter.strip()
+        else:
+            self.name, self.filter = fragment.clean, None
+
+    def references(self) -> List[str]:
+        return [self.name]
 
     def render(self, context: Dict[str, Any]):
         assert self.root.context is not None
 
-        filter: Optional[str]
-        if "|" in self.name:
-            name, filter = self.name.split("|", 1)
-            name, filter = name.strip(), filter.strip()
-        else:
-            name, filter = self.name, self.root.context.get("_default_filter")
+        filter = (
+            self.filter
+            if self.filter is not None
+            else self.root.context.get("_default_filter")
+        )
 
-        result = resolve(name, context)
+        result = resolve(self.name, context)
         if filter is not None:
             try:
                 filter_func = self.root.context["_filters"][filter]
@@ -178,6 +188,9 @@ class Each(ScopableNode):
         except ValueError as e:
             raise TemplateSyntaxError(fragment) from e
 
+    def references(self) -> List[str]:
+        return names(self.it, *([] if self.max is None else [self.max]))
+
     def render(self, context: Dict[str, Any]):
         max = None if self.max is None else int(self.max.resolve(context))
         items: List[Any] = [*self.it.resolve(context)]
@@ -202,6 +215,9 @@ class If(ScopableNode):
             self.op = bits[1]
             self.rhs = Evaluation.eval(bits[2])
 
+    def references(self) -> List[str]:
+        return names(self.lhs, *([self.rhs] if hasattr(self, "rhs") else []))
+
     def render(self, context: Dict[str, Any]):
         lhs = self.resolve_side(self.lhs, context)
         if hasattr(self, "op"):
@@ -259,6 +275,9 @@ class Call(Node):
                 args.append(Evaluation.eval(param))
         return args, kwargs
 
+    def references(self) -> List[str]:
+        return [self.callable, *names(*self.args, *self.kwargs.values())]
+
     def render(self, context: Dict[str, Any]):
         resolved_args, resolved_kwargs = [], {}
         for result in self.args:
@@ -1,7 +1,7 @@
 import ast
 from dataclasses import dataclass
 from enum import IntEnum, auto
-from typing import Any, Dict, Type
+from typing import Any, Dict, List, Type
 
 from .exceptions import TemplateContextError
 
@@ -30,6 +30,14 @@ class Evaluation:
     result: Any
 
 
+def names(*evaluations: Evaluation) -> List[str]:
+    return [
+        evaluation.result
+        for evaluation in evaluations
+        if evaluation.type is Evaluation.ResultType.NAME
+    ]
+
+
 def resolve(name: str, context: Dict[str, Any]) -> Any:
     if name.startswith(".."):
         context = context.get("..", {})
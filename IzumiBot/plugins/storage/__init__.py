@@ -0,0 +1,19 @@
+# flake8:noqa:F401
+from asyncio import get_running_loop
+from pathlib import Path
+
+from nonebot import get_driver
+
+from .store import Namespace, Storage
+
+driver = get_driver()
+
+storage = Storage(
+    Path(driver.config.storage_path or "data"),
+    flush_interval=driver.config.storage_flush_interval or 1,
+)
+
+
+@driver.on_shutdown
+async def close_storage():
+    await get_running_loop().run_in_executor(None, storage.close)
@@ -0,0 +1,150 @@
+import json
+import os
+from asyncio import get_running_loop
+from copy import deepcopy
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from threading import Event, Lock, Thread
+from typing import Any, Dict, Iterator, Optional
+
+from loguru import logger
+
+T_Changes = Dict[str, Optional[str]]
+
+
+class Namespace:
+    def __init__(self, storage: "Storage", name: str, data: Dict[str, Any]):
+        self.storage = storage
+        self.name = name
+        self.data = data
+
+    # values are copied in and out, so mutating them without calling set()
+    # never makes the working set diverge from what is flushed to disk
+    async def get(self, key: str, default: Any = None) -> Any:
+        return deepcopy(self.data[key]) if key in self.data else default
+
+    async def set(self, key: str, value: Any):
+        encoded = json.dumps(value, ensure_ascii=False)
+        self.data[key] = deepcopy(value)
+        self.storage.mark(self.name, key, encoded)
+
+    async def delete(self, key: str):
+        if key in self.data:
+            del self.data[key]
+            self.storage.mark(self.name, key, None)
+
+    async def flush(self):
+        await self.storage.flush()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([*self.data])
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+class Storage:
+    def __init__(self, path: Path, flush_interval: float = 1):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.namespaces: Dict[str, Namespace] = {}
+
+        self._persisted: Dict[str, Dict[str, str]] = {}
+        self._pending: Dict[str, T_Changes] = {}
+        self._namespaces_lock = Lock()
+        self._pending_lock = Lock()
+        self._flush_lock = Lock()
+        self._stopped = Event()
+        self._thread = Thread(target=self._run, name="storage-flusher", daemon=True)
+
+    def namespace(self, name: str) -> Namespace:
+        # may be called from executor threads to load large namespaces
+        with self._namespaces_lock:
+            if name in self.namespaces:
+                return self.namespaces[name]
+            if self._thread.ident is None:
+                # started on first use, importing the plugin has no side effects
+                self.path.mkdir(parents=True, exist_ok=True)
+                self._thread.start()
+
+            file = self.path / f"{name}.json"
+            data: Dict[str, Any] = (
+                json.loads(file.read_text(encoding="utf-8")) if file.exists() else {}
+            )
+            self._persisted[name] = {
+                key: json.dumps(value, ensure_ascii=False)
+                for key, value in data.items()
+            }
+            namespace = self.namespaces[name] = Namespace(self, name, data)
+            return namespace
+
+    def mark(self, namespace: str, key: str, encoded: Optional[str]):
+        with self._pending_lock:
+            self._pending.setdefault(namespace, {})[key] = encoded
+
+    def mark_dirty(self, namespace: str):
+        with self._pending_lock:
+            self._pending.setdefault(namespace, {})
+
+    def flush_pending(self):
+        with self._flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            for name, changes in pending.items():
+                persisted = self._persisted[name]
+                for key, encoded in changes.items():
+                    if encoded is None:
+                        persisted.pop(key, None)
+                    else:
+                        persisted[key] = encoded
+                try:
+                    self._write(self.path / f"{name}.json", persisted)
+                except OSError:
+                    logger.exception(f"Failed to flush storage namespace {name!r}")
+                    # keep namespace dirty so that it is rewritten next time
+                    self.mark_dirty(name)
+
+    async def flush(self):
+        await get_running_loop().run_in_executor(None, self.flush_pending)
+
+    def close(self):
+        self._stopped.set()
+        if self._thread.ident is not None:
+            self._thread.join()
+        self.flush_pending()
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            self.flush_pending()
+
+    @staticmethod
+    def _write(file: Path, persisted: Dict[str, str]):
+        content = (
+            "{"
+            + ",".join(
+                f"{json.dumps(key, ensure_ascii=False)}:{encoded}"
+                for key, encoded in persisted.items()
+            )
+            + "}"
+        )
+        # write to a sibling temporary file first, so that a crash
+        # during flushing never leaves a truncated file behind
+        with NamedTemporaryFile(
+            "w", encoding="utf-8", dir=file.parent, suffix=".tmp", delete=False
+        ) as f:
+            try:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+        try:
+            os.replace(f.name, file)
+        except BaseException:
+            os.unlink(f.name)
+            raise
@@ -0,0 +1,103 @@
+from array import array
+from functools import lru_cache
+from io import BytesIO
+from itertools import combinations
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+HASH_BITS = 64
+CHUNK_BITS = 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+CHUNKS = HASH_BITS // CHUNK_BITS
+
+
+def dhash(image_raw: bytes) -> int:
+    with Image.open(BytesIO(image_raw)) as image:
+        image.draft("L", (64, 64))
+        pixels = [*image.convert("L").resize((9, 8), Image.LANCZOS).getdata()]
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left, right = pixels[row * 9 + col], pixels[row * 9 + col + 1]
+            value = value << 1 | (left > right)
+    return value
+
+
+if hasattr(int, "bit_count"):
+    popcount: Callable[[int], int] = int.bit_count  # type:ignore
+else:
+
+    def popcount(value: int) -> int:
+        return bin(value).count("1")
+
+
+def hamming(a: int, b: int) -> int:
+    return popcount(a ^ b)
+
+
+@lru_cache(maxsize=None)
+def _flip_masks(radius: int) -> Tuple[int, ...]:
+    return tuple(
+        sum(1 << bit for bit in bits)
+        for distance in range(radius + 1)
+        for bits in combinations(range(CHUNK_BITS), distance)
+    )
+
+
+class HammingIndex:
+    def __init__(self, hashes: Iterable[int] = ()):
+        self.hashes = array("Q")
+        self.tables: List[Dict[int, array]] = [{} for _ in range(CHUNKS)]
+        for value in hashes:
+            self.add(value)
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    @classmethod
+    def load(cls, file: Path) -> "HammingIndex":
+        hashes = array("Q")
+        if file.exists():
+            raw = file.read_bytes()
+            # drop a trailing partial hash left behind by an interrupted append
+            hashes.frombytes(raw[: len(raw) - len(raw) % hashes.itemsize])
+        return cls(hashes)
+
+    @staticmethod
+    def append(file: Path, value: int):
+        with file.open("ab") as f:
+            f.write(array("Q", [value]).tobytes())
+
+    def add(self, value: int) -> int:
+        position = len(self.hashes)
+        self.hashes.append(value)
+        for chunk, table in enumerate(self.tables):
+            key = value >> (chunk * CHUNK_BITS) & CHUNK_MASK
+            if key not in table:
+                table[key] = array("I")
+            table[key].append(position)
+        return position
+
+    def search(self, value: int, radius: int) -> Optional[Tuple[int, int]]:
+        # any hash within the radius differs from the query by at most
+        # radius // CHUNKS bits on at least one chunk (pigeonhole principle),
+        # and chunks past the first radius % CHUNKS + 1 ones may use one bit less
+        hashes = self.hashes
+        best: Optional[Tuple[int, int]] = None
+        best_distance = radius + 1
+        for chunk, table in enumerate(self.tables):
+            chunk_radius = radius // CHUNKS - (chunk > radius % CHUNKS)
+            if chunk_radius < 0:
+                break
+            key = value >> (chunk * CHUNK_BITS) & CHUNK_MASK
+            for mask in _flip_masks(chunk_radius):
+                positions = table.get(key ^ mask)
+                if positions is None:
+                    continue
+                for position in positions:
+                    distance = popcount(hashes[position] ^ value)
+                    if distance < best_distance:
+                        best, best_distance = (position, distance), distance
+        return best
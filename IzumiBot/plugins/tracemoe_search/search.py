@@ -0,0 +1,131 @@
+from asyncio import Future, get_running_loop
+from io import BytesIO
+from typing import Any, Dict, Optional
+
+from httpx import AsyncClient
+from IzumiBot.plugins.message_template import Template
+from IzumiBot.plugins.storage import Namespace, storage
+from nonebot import get_driver
+from nonebot.adapters.cqhttp import MessageSegment
+from nonebot.adapters.cqhttp.utils import escape
+
+from .index import HammingIndex, dhash, popcount
+from .models import AnimeResult
+
+HASH_RADIUS: int = get_driver().config.tracemoe_hash_radius
+if HASH_RADIUS is None:
+    HASH_RADIUS = 6
+
+# flat or smoothly shaded frames hash to (nearly) all zero bits and would
+# match each other, so these are never looked up or stored in the cache
+MIN_HASH_BITS = 8
+
+HASHES_FILE = storage.path / "tracemoe_search.hashes"
+
+_index: "Optional[Future[HammingIndex]]" = None
+
+
+def escape_message(msg) -> str:
+    return escape(str(msg))
+
+
+def image(url: str) -> str:
+    return str(MessageSegment.image(url))
+
+
+def raw(msg) -> str:
+    return str(msg)
+
+
+TEMPLATE = Template(
+    """以下为以图搜番结果:
+    {% each item in data.result max 3 %}--------
+    {% if item.anilist.isAdult %}(NSFW Content){% else %}{{item.image|image}}{% end %}
+    番剧名称:{{ item.anilist.title.native }}
+    相似度:{{item.similarity}}{% end %}
+""",
+    filters=[escape_message, raw, image],
+    default_filter="escape_message",
+    context={"data": AnimeResult},
+)
+
+
+async def get_index() -> HammingIndex:
+    # building the index is slow for large caches, keep it off the event loop
+    global _index
+    if _index is None:
+        _index = get_running_loop().run_in_executor(
+            None, HammingIndex.load, HASHES_FILE
+        )
+    loading = _index
+    try:
+        return await loading
+    except Exception:
+        # don't keep re-raising a failed load, try again on the next search
+        if _index is loading:
+            _index = None
+        raise
+
+
+async def get_shard(image_hash: int) -> Namespace:
+    # answers are sharded by the top byte of the hash, so that a flush only
+    # rewrites the shard that changed instead of every answer ever stored
+    return await get_running_loop().run_in_executor(
+        None, storage.namespace, f"tracemoe_search.{image_hash >> 56:02x}"
+    )
+
+
+async def lookup(image_hash: int) -> Optional[Dict[str, Any]]:
+    index = await get_index()
+    matched = index.search(image_hash, HASH_RADIUS)
+    if matched is None:
+        return None
+    position, _ = matched
+    stored_hash = index.hashes[position]
+    shard = await get_shard(stored_hash)
+    return await shard.get(f"{stored_hash:016x}")
+
+
+async def remember(image_hash: int, data: Dict[str, Any]):
+    index, shard = await get_index(), await get_shard(image_hash)
+    key = f"{image_hash:016x}"
+    if key not in shard:
+        index.add(image_hash)
+        await get_running_loop().run_in_executor(
+            None, HammingIndex.append, HASHES_FILE, image_hash
+        )
+    await shard.set(key, data)
+
+
+async def search(image_url: str) -> Dict[str, Any]:
+    async with AsyncClient() as client:
+        image_response = await client.get(image_url)
+        image_raw = image_response.content
+
+        image_hash: Optional[int]
+        try:
+            image_hash = await get_running_loop().run_in_executor(
+                None, dhash, image_raw
+            )
+        except OSError:
+            # not an image pillow could decode, leave it to trace.moe
+            image_hash = None
+        if image_hash is not None and popcount(image_hash) < MIN_HASH_BITS:
+            image_hash = None
+        cached = None if image_hash is None else await lookup(image_hash)
+        if cached is not None:
+            return cached
+
+        response = await client.post(
+            "https://api.trace.moe/search",
+            params={"anilistInfo": True},
+            files={"image": BytesIO(image_raw)},
+        )
+        result = AnimeResult.parse_obj(response.json())
+
+    # only keep the fields the template reads, for both replies and the cache
+    result.result.sort(key=lambda item: item.similarity, reverse=True)
+    data = {"error": result.error, **result.dict(include=TEMPLATE.include("data"))}
+    if data["result"] and image_hash is not None:
+        await remember(image_hash, data)
+    return data
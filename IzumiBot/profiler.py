@@ -0,0 +1,78 @@
+import sys
+from contextvars import Context, copy_context
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Dict, Optional, Set
+
+import tomlkit
+from loguru import logger
+from nonebot.plugin import PLUGIN_NAMESPACE, Plugin, PluginManager, _load_plugin
+
+
+@dataclass
+class PluginProfile:
+    name: str
+    import_time: float = 0
+    init_time: Optional[float] = None
+    modules: int = 0
+    loaded: bool = False
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.profiles: Dict[str, PluginProfile] = {}
+
+    def load_all_plugins(
+        self, module_path: Set[str], plugin_dir: Set[str]
+    ) -> Set[Plugin]:
+        # same as nonebot.load_all_plugins, timing every plugin on the way
+        loaded_plugins = set()
+        manager = PluginManager(PLUGIN_NAMESPACE, module_path, plugin_dir)
+        for plugin_name in manager.list_plugins():
+            profile = self.profiles.setdefault(plugin_name, PluginProfile(plugin_name))
+            modules_before = len(sys.modules)
+            start = perf_counter()
+            context: Context = copy_context()
+            result = context.run(_load_plugin, manager, plugin_name)
+            profile.import_time = perf_counter() - start
+            profile.modules = len(sys.modules) - modules_before
+            profile.loaded = result is not None
+            if result:
+                loaded_plugins.add(result)
+        return loaded_plugins
+
+    def load_from_toml(self, file_path: str, encoding: str = "utf-8") -> Set[Plugin]:
+        with open(file_path, "r", encoding=encoding) as f:
+            data = tomlkit.parse(f.read())
+
+        plugins_data = data.get("nonebot", {}).get("plugins")
+        if not plugins_data:
+            raise ValueError("Cannot find '[nonebot.plugins]' in given toml file!")
+        plugins = plugins_data.get("plugins", [])
+        plugin_dirs = plugins_data.get("plugin_dirs", [])
+        assert isinstance(plugins, list), "plugins must be a list of plugin name"
+        assert isinstance(
+            plugin_dirs, list
+        ), "plugin_dirs must be a list of directories"
+        return self.load_all_plugins(set(plugins), set(plugin_dirs))
+
+    def record_init(self, module_path: str, elapsed: float):
+        profile = self.profiles.setdefault(module_path, PluginProfile(module_path))
+        profile.init_time = elapsed
+        logger.info(f"Plugin {module_path!r} deferred init took {elapsed * 1000:.2f}ms")
+
+    def report(self):
+        total = sum(profile.import_time for profile in self.profiles.values())
+        for profile in sorted(
+            self.profiles.values(), key=lambda p: p.import_time, reverse=True
+        ):
+            logger.info(
+                f"Plugin {profile.name!r} "
+                + ("loaded" if profile.loaded else "failed")
+                + f" in {profile.import_time * 1000:.2f}ms"
+                + f" ({profile.modules} new modules)"
+            )
+        logger.info(f"Loaded {len(self.profiles)} plugins in {total * 1000:.2f}ms")
+
+
+profiler = StartupProfiler()
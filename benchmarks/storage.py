@@ -0,0 +1,70 @@
+"""
+Write throughput and event loop blocking time of the write-behind storage,
+compared with plain tinydb (which rewrites the whole JSON file per write).
+
+Usage: python -m benchmarks.storage [--writes N] [--keys N]
+"""
+
+import asyncio
+from argparse import ArgumentParser
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Awaitable, Callable, List
+
+import nonebot
+
+nonebot.init()
+
+from IzumiBot.plugins.storage.store import Storage  # noqa:E402
+from tinydb import Query, TinyDB  # noqa:E402
+
+
+async def measure(name: str, writes: int, write: Callable[[int], Awaitable[None]]):
+    blocked: List[float] = []
+    start = perf_counter()
+    for i in range(writes):
+        begin = perf_counter()
+        await write(i)
+        blocked.append(perf_counter() - begin)
+    elapsed = perf_counter() - start
+    blocked.sort()
+    print(
+        f"{name:<12} {writes / elapsed:>10.0f} writes/s"
+        f"  p50 {blocked[len(blocked) // 2] * 1e6:>8.1f}us"
+        f"  p99 {blocked[int(len(blocked) * 0.99)] * 1e6:>8.1f}us"
+        f"  max {blocked[-1] * 1e6:>8.1f}us"
+    )
+
+
+async def main(writes: int, keys: int):
+    with TemporaryDirectory() as directory:
+        storage = Storage(Path(directory) / "storage")
+        namespace = storage.namespace("benchmark")
+
+        async def storage_write(i: int):
+            await namespace.set(str(i % keys), {"index": i, "text": "x" * 32})
+
+        await measure("write-behind", writes, storage_write)
+        start = perf_counter()
+        storage.close()
+        print(f"{'':<12} final flush took {(perf_counter() - start) * 1e3:.2f}ms")
+
+        table = TinyDB(Path(directory) / "tinydb.json").table("benchmark")
+        query = Query()
+
+        async def tinydb_write(i: int):
+            table.upsert(
+                {"key": str(i % keys), "index": i, "text": "x" * 32},
+                query.key == str(i % keys),
+            )
+
+        await measure("tinydb", writes, tinydb_write)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--keys", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.writes, args.keys))
@@ -1,14 +1,16 @@
 import nonebot
 from fastapi import FastAPI
-from nonebot.adapters.cqhttp import Bot as CQHTTPBot
+from IzumiBot.dispatcher import QueuedBot
+from IzumiBot.profiler import profiler
 
 nonebot.init()
 app: FastAPI = nonebot.get_asgi()
 
 driver = nonebot.get_driver()
-driver.register_adapter("cqhttp", CQHTTPBot)  # type:ignore
+driver.register_adapter("cqhttp", QueuedBot)  # type:ignore
 
-nonebot.load_from_toml("pyproject.toml")
+profiler.load_from_toml("pyproject.toml")
+profiler.report()
 
 if __name__ == "__main__":
     nonebot.run()